@@ -6,9 +6,13 @@ from typing import List, Optional
 from ..database import get_db
 from ..schemas import CompanyDashboardResponse, CompanySearchResult
 from ..utils.db_helpers import is_missing_table_error, rows_to_dicts
+from ..utils.ttl_cache import TimedMemo
 
 router = APIRouter()
 
+# information_schema 探测结果缓存：每个请求都要判断 brand_name 列，表结构只在数据发布时变化
+_column_memo = TimedMemo(seconds=300)
+
 
 def _date_filter(where: str, params: dict, start_year_month: Optional[str], end_year_month: Optional[str]) -> tuple[str, dict]:
     if start_year_month:
@@ -24,16 +28,11 @@ def _date_filter(where: str, params: dict, start_year_month: Optional[str], end_
 
 def _hs_filter(where: str, params: dict, hs_code: Optional[List[str]], hs_code_prefix: Optional[List[str]]) -> tuple[str, dict]:
     if hs_code:
-        ph = ", ".join(f":hs_{i}" for i in range(len(hs_code)))
-        where += f" AND hs_code IN ({ph})"
-        for i, code in enumerate(hs_code):
-            params[f"hs_{i}"] = code
+        where += " AND hs_code = ANY(:hs_codes)"
+        params["hs_codes"] = list(hs_code)
     elif hs_code_prefix:
-        conds = []
-        for i, prefix in enumerate(hs_code_prefix):
-            params[f"hsp_{i}"] = f"{prefix}%"
-            conds.append(f"hs_code LIKE :hsp_{i}")
-        where += f" AND ({' OR '.join(conds)})"
+        where += " AND hs_code LIKE ANY(:hs_prefixes)"
+        params["hs_prefixes"] = [f"{prefix}%" for prefix in hs_code_prefix]
     return where, params
 
 
@@ -53,46 +52,111 @@ def _ranking_sql(metric: Optional[str]) -> tuple[str, str, str]:
 
 
 def _has_column(db: Session, table_name: str, column_name: str) -> bool:
-    result = db.execute(
-        text(
-            """
-            SELECT EXISTS (
-                SELECT 1
-                FROM information_schema.columns
-                WHERE table_schema = 'public'
-                  AND table_name = :table_name
-                  AND column_name = :column_name
-            )
-            """
-        ),
-        {"table_name": table_name, "column_name": column_name},
-    )
-    return bool(result.scalar())
+    def load() -> bool:
+        result = db.execute(
+            text(
+                """
+                SELECT EXISTS (
+                    SELECT 1
+                    FROM information_schema.columns
+                    WHERE table_schema = 'public'
+                      AND table_name = :table_name
+                      AND column_name = :column_name
+                )
+                """
+            ),
+            {"table_name": table_name, "column_name": column_name},
+        )
+        return bool(result.scalar())
+
+    return _column_memo.get_or_load((table_name, column_name), load)
+
+
+# HS6 → 品类标签：SQL 聚合与 Python 回填共用同一份映射
+CATEGORY_HS_CODES: tuple[tuple[str, tuple[str, ...]], ...] = (
+    ("Materials & Metrology", ("903141", "903082", "381800")),
+    ("Equipment", ("848610", "848620", "848630", "848640", "848690")),
+    ("Products", ("854231", "854232", "854233", "854239")),
+)
 
 
 def _category_labels_sql(alias: str = "h") -> str:
+    cases = []
+    for label, codes in CATEGORY_HS_CODES:
+        in_list = ", ".join(f"'{code}'" for code in codes)
+        cases.append(
+            f"""
+            CASE WHEN COUNT(*) FILTER (WHERE {alias}.hs_code IN ({in_list})) > 0
+                THEN '{label}' END"""
+        )
     return f"""
-        ARRAY_REMOVE(ARRAY[
-            CASE WHEN COUNT(*) FILTER (WHERE {alias}.hs_code IN ('903141', '903082', '381800')) > 0
-                THEN 'Materials & Metrology' END,
-            CASE WHEN COUNT(*) FILTER (WHERE {alias}.hs_code IN ('848610', '848620', '848630', '848640', '848690')) > 0
-                THEN 'Equipment' END,
-            CASE WHEN COUNT(*) FILTER (WHERE {alias}.hs_code IN ('854231', '854232', '854233', '854239')) > 0
-                THEN 'Products' END
+        ARRAY_REMOVE(ARRAY[{",".join(cases)}
         ], NULL)
     """
 
 
+# 品类标签 SQL 只依赖常量，模块加载时生成一次
+_CATEGORY_LABELS_SQL = _category_labels_sql("h")
+
+
 def _category_labels_from_hs_codes(hs_codes: list[str]) -> list[str]:
-    labels = []
     hs_set = set(hs_codes)
-    if hs_set.intersection({"903141", "903082", "381800"}):
-        labels.append("Materials & Metrology")
-    if hs_set.intersection({"848610", "848620", "848630", "848640", "848690"}):
-        labels.append("Equipment")
-    if hs_set.intersection({"854231", "854232", "854233", "854239"}):
-        labels.append("Products")
-    return labels
+    return [label for label, codes in CATEGORY_HS_CODES if not hs_set.isdisjoint(codes)]
+
+
+def _counterparty_rank_sql(where: str, order_metric: str, secondary_metric: str, has_brand: bool) -> str:
+    # 先排名截断到 :limit，再只为入榜公司分组查一次品牌，避免每次请求对 company_search_stats 全表分组
+    if has_brand:
+        brand_select = "bl.brand_name"
+        brand_cte = """,
+        brand_lookup AS (
+            SELECT name, NULLIF(MAX(brand_name), '') AS brand_name
+            FROM company_search_stats
+            WHERE name IN (SELECT company FROM ranked)
+            GROUP BY name
+        )"""
+        brand_join = "LEFT JOIN brand_lookup bl ON bl.name = r.company"
+    else:
+        brand_select = "NULL::text"
+        brand_cte = ""
+        brand_join = ""
+    return f"""
+        WITH agg AS (
+            SELECT
+                counterparty_name AS company,
+                counterparty_country_code AS country_code,
+                COALESCE(SUM(sum_of_usd), 0) AS sum_of_usd,
+                COALESCE(SUM(trade_count), 0) AS trade_count
+            FROM company_counterparty_trade_stats
+            {where}
+            GROUP BY counterparty_name, counterparty_country_code
+        ),
+        ranked AS (
+            SELECT
+                ROW_NUMBER() OVER (ORDER BY {order_metric} DESC, {secondary_metric} DESC, company, country_code) AS rank,
+                company,
+                country_code,
+                sum_of_usd,
+                trade_count,
+                CASE WHEN SUM({order_metric}) OVER() = 0 THEN 0
+                     ELSE {order_metric}::numeric / SUM({order_metric}) OVER()
+                END AS share_pct
+            FROM agg
+            ORDER BY rank
+            LIMIT :limit
+        ){brand_cte}
+        SELECT
+            r.rank,
+            r.company,
+            {brand_select} AS brand_name,
+            r.country_code,
+            r.sum_of_usd,
+            r.trade_count,
+            r.share_pct
+        FROM ranked r
+        {brand_join}
+        ORDER BY r.rank
+    """
 
 
 @router.get("/search", response_model=List[CompanySearchResult])
@@ -120,16 +184,12 @@ def search_companies(
         params["keyword"] = f"%{keyword}%"
 
     if brand and has_brand:
-        ph = ", ".join(f":brand_{i}" for i in range(len(brand)))
-        where += f" AND s.brand_name IN ({ph})"
-        for i, value in enumerate(brand):
-            params[f"brand_{i}"] = value
+        where += " AND s.brand_name = ANY(:brands)"
+        params["brands"] = list(brand)
 
     if country:
-        ph = ", ".join(f":country_{i}" for i in range(len(country)))
-        where += f" AND s.country_code IN ({ph})"
-        for i, code in enumerate(country):
-            params[f"country_{i}"] = code
+        where += " AND s.country_code = ANY(:countries)"
+        params["countries"] = list(country)
 
     if role == "importer":
         where += " AND s.role IN ('importer', 'both')"
@@ -158,7 +218,7 @@ def search_companies(
             COALESCE(s.trade_count, 0) AS trade_count
         FROM company_search_stats s
         LEFT JOIN LATERAL (
-            SELECT {_category_labels_sql("h")} AS category_labels
+            SELECT {_CATEGORY_LABELS_SQL} AS category_labels
             FROM company_hs_trade_stats h
             WHERE h.company_name = s.name
               AND h.country_code IS NOT DISTINCT FROM s.country_code
@@ -344,74 +404,8 @@ def get_company_dashboard(
         ORDER BY {order_metric} DESC, {secondary_metric} DESC
     """
 
-    brand_lookup_cte = """
-        brand_lookup AS (
-            SELECT name, NULLIF(MAX(brand_name), '') AS brand_name
-            FROM company_search_stats
-            GROUP BY name
-        ),
-    """ if has_brand else """
-        brand_lookup AS (
-            SELECT NULL::text AS name, NULL::text AS brand_name
-            WHERE FALSE
-        ),
-    """
-
-    suppliers_query = f"""
-        WITH {brand_lookup_cte}
-        agg AS (
-            SELECT
-                counterparty_name AS company,
-                counterparty_country_code AS country_code,
-                COALESCE(SUM(sum_of_usd), 0) AS sum_of_usd,
-                COALESCE(SUM(trade_count), 0) AS trade_count
-            FROM company_counterparty_trade_stats
-            {importer_counterparty_where}
-            GROUP BY counterparty_name, counterparty_country_code
-        )
-        SELECT
-            ROW_NUMBER() OVER (ORDER BY a.{order_metric} DESC, a.{secondary_metric} DESC, a.company, a.country_code) AS rank,
-            a.company,
-            bl.brand_name,
-            a.country_code,
-            a.sum_of_usd,
-            a.trade_count,
-            CASE WHEN SUM(a.{order_metric}) OVER() = 0 THEN 0
-                 ELSE a.{order_metric}::numeric / SUM(a.{order_metric}) OVER()
-            END AS share_pct
-        FROM agg a
-        LEFT JOIN brand_lookup bl ON bl.name = a.company
-        ORDER BY rank
-        LIMIT :limit
-    """
-
-    customers_query = f"""
-        WITH {brand_lookup_cte}
-        agg AS (
-            SELECT
-                counterparty_name AS company,
-                counterparty_country_code AS country_code,
-                COALESCE(SUM(sum_of_usd), 0) AS sum_of_usd,
-                COALESCE(SUM(trade_count), 0) AS trade_count
-            FROM company_counterparty_trade_stats
-            {exporter_counterparty_where}
-            GROUP BY counterparty_name, counterparty_country_code
-        )
-        SELECT
-            ROW_NUMBER() OVER (ORDER BY a.{order_metric} DESC, a.{secondary_metric} DESC, a.company, a.country_code) AS rank,
-            a.company,
-            bl.brand_name,
-            a.country_code,
-            a.sum_of_usd,
-            a.trade_count,
-            CASE WHEN SUM(a.{order_metric}) OVER() = 0 THEN 0
-                 ELSE a.{order_metric}::numeric / SUM(a.{order_metric}) OVER()
-            END AS share_pct
-        FROM agg a
-        LEFT JOIN brand_lookup bl ON bl.name = a.company
-        ORDER BY rank
-        LIMIT :limit
-    """
+    suppliers_query = _counterparty_rank_sql(importer_counterparty_where, order_metric, secondary_metric, has_brand)
+    customers_query = _counterparty_rank_sql(exporter_counterparty_where, order_metric, secondary_metric, has_brand)
 
     trends_query = f"""
         SELECT
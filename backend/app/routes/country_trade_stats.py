@@ -15,9 +15,11 @@ from ..schemas import (
     HSQuarterAggregate,
 )
 from ..services.trade_query import (
+    BOTH_SIDES_JOIN,
     TABLE,
     TradeFilters,
     apply_filters,
+    available_hs_codes,
     country_col,
     country_side_source,
     execute_safe,
@@ -104,7 +106,7 @@ def get_country_trade_stats(
     params: dict = {}
 
     if td == "all":
-        # UNION ALL: 每条记录在 origin 和 destination 侧各算一次
+        # 双侧口径：每条记录在 origin 和 destination 侧各算一次
         base_where = " WHERE 1=1"
         base_where, params = _apply_filters(
             base_where, params,
@@ -115,17 +117,12 @@ def get_country_trade_stats(
         )
         query = f"""
             SELECT
-                hs_code, year, month, country_code,
-                SUM(sum_of_usd)::numeric AS sum_of_usd,
+                hs_code, year, month, side.country_code,
+                SUM(sum_of_usd)::float8 AS sum_of_usd,
                 SUM(trade_count)::bigint AS trade_count
-            FROM (
-                SELECT hs_code, year, month, origin_country_code AS country_code,
-                       sum_of_usd, trade_count FROM {TABLE}{base_where}
-                UNION ALL
-                SELECT hs_code, year, month, destination_country_code AS country_code,
-                       sum_of_usd, trade_count FROM {TABLE}{base_where}
-            ) sub
-            GROUP BY hs_code, year, month, country_code
+            FROM {TABLE}
+            {BOTH_SIDES_JOIN}{base_where}
+            GROUP BY hs_code, year, month, side.country_code
             ORDER BY year DESC, month DESC, sum_of_usd DESC
         """
     else:
@@ -133,7 +130,7 @@ def get_country_trade_stats(
         query = f"""
             SELECT
                 hs_code, year, month, {cc} AS country_code,
-                SUM(sum_of_usd)::numeric AS sum_of_usd,
+                SUM(sum_of_usd)::float8 AS sum_of_usd,
                 SUM(trade_count)::bigint AS trade_count
             FROM {TABLE} WHERE 1=1
         """
@@ -191,25 +188,20 @@ def get_summary(
         )
         query = f"""
             SELECT
-                COUNT(DISTINCT country_code) AS total_countries,
-                COALESCE(SUM(sum_of_usd), 0) AS total_trade_value,
-                COALESCE(SUM(trade_count), 0) AS total_trade_count,
+                COUNT(DISTINCT side.country_code) AS total_countries,
+                COALESCE(SUM(sum_of_usd), 0)::float8 AS total_trade_value,
+                COALESCE(SUM(trade_count), 0)::bigint AS total_trade_count,
                 0 AS avg_share_pct
-            FROM (
-                SELECT origin_country_code AS country_code, sum_of_usd, trade_count
-                FROM {TABLE}{base_where}
-                UNION ALL
-                SELECT destination_country_code AS country_code, sum_of_usd, trade_count
-                FROM {TABLE}{base_where}
-            ) sub
+            FROM {TABLE}
+            {BOTH_SIDES_JOIN}{base_where}
         """
     else:
         cc = _country_col(td)
         query = f"""
             SELECT
                 COUNT(DISTINCT {cc}) AS total_countries,
-                COALESCE(SUM(sum_of_usd), 0) AS total_trade_value,
-                COALESCE(SUM(trade_count), 0) AS total_trade_count,
+                COALESCE(SUM(sum_of_usd), 0)::float8 AS total_trade_value,
+                COALESCE(SUM(trade_count), 0)::bigint AS total_trade_count,
                 0 AS avg_share_pct
             FROM {TABLE} WHERE 1=1
         """
@@ -274,8 +266,8 @@ def get_trends(
     query = f"""
         SELECT
             TO_CHAR(TO_DATE(year || '-' || LPAD(month::text, 2, '0') || '-01', 'YYYY-MM-DD'), 'YYYY-MM') AS year_month,
-            COALESCE(SUM(sum_of_usd), 0) AS sum_of_usd,
-            COALESCE(SUM(trade_count), 0) AS trade_count
+            COALESCE(SUM(sum_of_usd), 0)::float8 AS sum_of_usd,
+            COALESCE(SUM(trade_count), 0)::bigint AS trade_count
         FROM {TABLE}{where}
         GROUP BY year, month ORDER BY year, month
     """
@@ -317,20 +309,15 @@ def get_top_countries(
         )
         query = f"""
             SELECT
-                country_code,
-                SUM(sum_of_usd) AS sum_of_usd,
-                SUM(trade_count) AS trade_count,
+                side.country_code,
+                SUM(sum_of_usd)::float8 AS sum_of_usd,
+                SUM(trade_count)::bigint AS trade_count,
                 CASE WHEN {share_denominator} = 0 THEN 0
                      ELSE {share_numerator} / {share_denominator}
-                END AS amount_share_pct
-            FROM (
-                SELECT origin_country_code AS country_code, sum_of_usd, trade_count
-                FROM {TABLE}{base_where}
-                UNION ALL
-                SELECT destination_country_code AS country_code, sum_of_usd, trade_count
-                FROM {TABLE}{base_where}
-            ) sub
-            GROUP BY country_code
+                END::float8 AS amount_share_pct
+            FROM {TABLE}
+            {BOTH_SIDES_JOIN}{base_where}
+            GROUP BY side.country_code
             ORDER BY {order_metric} DESC
             LIMIT :lim
         """
@@ -339,11 +326,11 @@ def get_top_countries(
         query = f"""
             SELECT
                 {cc} AS country_code,
-                SUM(sum_of_usd) AS sum_of_usd,
-                SUM(trade_count) AS trade_count,
+                SUM(sum_of_usd)::float8 AS sum_of_usd,
+                SUM(trade_count)::bigint AS trade_count,
                 CASE WHEN {share_denominator} = 0 THEN 0
                      ELSE {share_numerator} / {share_denominator}
-                END AS amount_share_pct
+                END::float8 AS amount_share_pct
             FROM {TABLE} WHERE 1=1
         """
         query, params = _apply_filters(
@@ -393,17 +380,12 @@ def get_top_countries_quarterly(
                 SELECT
                     year,
                     ((month - 1) / 3 + 1) AS quarter,
-                    country_code,
-                    SUM(sum_of_usd) AS sum_of_usd,
-                    SUM(trade_count) AS trade_count
-                FROM (
-                    SELECT year, month, origin_country_code AS country_code, sum_of_usd, trade_count
-                    FROM {TABLE}{base_where}
-                    UNION ALL
-                    SELECT year, month, destination_country_code AS country_code, sum_of_usd, trade_count
-                    FROM {TABLE}{base_where}
-                ) merged
-                GROUP BY year, quarter, country_code
+                    side.country_code,
+                    SUM(sum_of_usd)::float8 AS sum_of_usd,
+                    SUM(trade_count)::bigint AS trade_count
+                FROM {TABLE}
+                {BOTH_SIDES_JOIN}{base_where}
+                GROUP BY year, quarter, side.country_code
             ),
             ranked AS (
                 SELECT
@@ -444,8 +426,8 @@ def get_top_countries_quarterly(
                     year,
                     ((month - 1) / 3 + 1) AS quarter,
                     {cc} AS country_code,
-                    SUM(sum_of_usd) AS sum_of_usd,
-                    SUM(trade_count) AS trade_count
+                    SUM(sum_of_usd)::float8 AS sum_of_usd,
+                    SUM(trade_count)::bigint AS trade_count
                 FROM {TABLE}{where}
                 GROUP BY year, quarter, {cc}
             ),
@@ -503,8 +485,8 @@ def get_country_aggregate(
     query = f"""
         SELECT
             {country_expr} AS country_code,
-            SUM(sum_of_usd) AS sum_of_usd,
-            SUM(trade_count) AS trade_count
+            SUM(sum_of_usd)::float8 AS sum_of_usd,
+            SUM(trade_count)::bigint AS trade_count
         FROM {source}
         GROUP BY {country_expr}
         ORDER BY sum_of_usd DESC
@@ -539,33 +521,15 @@ def get_country_quarterly(
             trade_direction=td,
         )
         query = f"""
-            WITH side_scope AS (
-                SELECT
-                    year,
-                    ((month - 1) / 3 + 1) AS quarter,
-                    origin_country_code AS country_code,
-                    SUM(sum_of_usd) AS sum_of_usd,
-                    SUM(trade_count) AS trade_count
-                FROM {TABLE}{base_where}
-                GROUP BY year, quarter, origin_country_code
-                UNION ALL
-                SELECT
-                    year,
-                    ((month - 1) / 3 + 1) AS quarter,
-                    destination_country_code AS country_code,
-                    SUM(sum_of_usd) AS sum_of_usd,
-                    SUM(trade_count) AS trade_count
-                FROM {TABLE}{base_where}
-                GROUP BY year, quarter, destination_country_code
-            )
             SELECT
                 year,
-                quarter,
-                country_code,
-                SUM(sum_of_usd) AS sum_of_usd,
-                SUM(trade_count) AS trade_count
-            FROM side_scope
-            GROUP BY year, quarter, country_code
+                ((month - 1) / 3 + 1) AS quarter,
+                side.country_code,
+                SUM(sum_of_usd)::float8 AS sum_of_usd,
+                SUM(trade_count)::bigint AS trade_count
+            FROM {TABLE}
+            {BOTH_SIDES_JOIN}{base_where}
+            GROUP BY year, quarter, side.country_code
             ORDER BY year, quarter, sum_of_usd DESC
             LIMIT :lim
         """
@@ -585,8 +549,8 @@ def get_country_quarterly(
                 year,
                 ((month - 1) / 3 + 1) AS quarter,
                 {country_expr} AS country_code,
-                SUM(sum_of_usd) AS sum_of_usd,
-                SUM(trade_count) AS trade_count
+                SUM(sum_of_usd)::float8 AS sum_of_usd,
+                SUM(trade_count)::bigint AS trade_count
             FROM {source}
             GROUP BY year, quarter, {country_expr}
             ORDER BY year, quarter, sum_of_usd DESC
@@ -622,8 +586,8 @@ def get_hs_aggregate(
     query = f"""
         SELECT
             hs_code,
-            SUM(sum_of_usd) AS sum_of_usd,
-            SUM(trade_count) AS trade_count
+            SUM(sum_of_usd)::float8 AS sum_of_usd,
+            SUM(trade_count)::bigint AS trade_count
         FROM {source}
         GROUP BY hs_code
         ORDER BY sum_of_usd DESC
@@ -663,8 +627,8 @@ def get_hs_quarterly(
             year,
             ((month - 1) / 3 + 1) AS quarter,
             hs_code,
-            SUM(sum_of_usd) AS sum_of_usd,
-            SUM(trade_count) AS trade_count
+            SUM(sum_of_usd)::float8 AS sum_of_usd,
+            SUM(trade_count)::bigint AS trade_count
         FROM {source}
         GROUP BY year, quarter, hs_code
         ORDER BY year, quarter, sum_of_usd DESC
@@ -681,12 +645,4 @@ def get_hs_quarterly(
 
 @router.get("/hs-codes", response_model=List[str])
 def get_available_hs_codes(db: Session = Depends(get_db)):
-    query = f"""
-        SELECT DISTINCT hs_code FROM {TABLE}
-        WHERE hs_code IS NOT NULL AND hs_code <> ''
-        ORDER BY hs_code
-    """
-    result = _safe(db, query, params={}, fallback=[])
-    if result == []:
-        return []
-    return [row[0] for row in result.fetchall()]
+    return available_hs_codes(db)
@@ -6,7 +6,7 @@ from typing import List, Optional
 
 from ..database import get_db
 from ..schemas import Shipment
-from ..utils.db_helpers import is_missing_table_error
+from ..utils.db_helpers import is_missing_table_error, rows_to_dicts
 from ..utils.logger import get_logger
 
 router = APIRouter()
@@ -37,27 +37,20 @@ def _apply_common_filters(
         params["ey"], params["em"] = int(y), int(m)
 
     if country:
-        ph = ", ".join([f":c_{i}" for i in range(len(country))])
         if trade_direction == "import":
-            query += f" AND destination_country_code IN ({ph})"
+            query += " AND destination_country_code = ANY(:countries)"
         elif trade_direction == "export":
-            query += f" AND origin_country_code IN ({ph})"
+            query += " AND origin_country_code = ANY(:countries)"
         else:
-            query += f" AND (origin_country_code IN ({ph}) OR destination_country_code IN ({ph}))"
-        for i, c in enumerate(country):
-            params[f"c_{i}"] = c
+            query += " AND (origin_country_code = ANY(:countries) OR destination_country_code = ANY(:countries))"
+        params["countries"] = list(country)
 
     if hs_code:
-        ph = ", ".join([f":hs_{i}" for i in range(len(hs_code))])
-        query += f" AND hs_code IN ({ph})"
-        for i, c in enumerate(hs_code):
-            params[f"hs_{i}"] = c
+        query += " AND hs_code = ANY(:hs_codes)"
+        params["hs_codes"] = list(hs_code)
     elif hs_code_prefix:
-        conds = []
-        for i, p in enumerate(hs_code_prefix):
-            params[f"hsp_{i}"] = f"{p}%"
-            conds.append(f"hs_code LIKE :hsp_{i}")
-        query += f" AND ({' OR '.join(conds)})"
+        query += " AND hs_code LIKE ANY(:hs_prefixes)"
+        params["hs_prefixes"] = [f"{p}%" for p in hs_code_prefix]
 
     return query, params
 
@@ -94,8 +87,8 @@ def get_trade_flows(
                 LEFT(hs_code, 2) AS hs_code,
                 origin_country_code,
                 destination_country_code,
-                COALESCE(SUM(sum_of_usd), 0) AS total_value_usd,
-                COALESCE(SUM(trade_count), 0) AS trade_count,
+                COALESCE(SUM(sum_of_usd), 0)::float8 AS total_value_usd,
+                COALESCE(SUM(trade_count), 0)::bigint AS trade_count,
                 origin_country_code AS country_of_origin,
                 destination_country_code AS destination_country,
                 NULL::text AS date
@@ -109,21 +102,7 @@ def get_trade_flows(
             params["lim"] = limit
 
         result = db.execute(text(query), params)
-        return [
-            {
-                "year": row.year,
-                "month": row.month,
-                "hs_code": row.hs_code,
-                "origin_country_code": row.origin_country_code,
-                "destination_country_code": row.destination_country_code,
-                "total_value_usd": float(row.total_value_usd) if row.total_value_usd else 0,
-                "trade_count": int(row.trade_count) if row.trade_count else 0,
-                "country_of_origin": row.country_of_origin,
-                "destination_country": row.destination_country,
-                "date": row.date,
-            }
-            for row in result.fetchall()
-        ]
+        return rows_to_dicts(result, result.fetchall())
     except Exception as e:
         if is_missing_table_error(e):
             logger.warning("country_origin_trade_stats not available: %s", e)
@@ -151,8 +130,8 @@ def get_shipments(
                 hs_code,
                 origin_country_code,
                 destination_country_code,
-                sum_of_usd AS total_value_usd,
-                trade_count,
+                NULLIF(sum_of_usd, 0)::float8 AS total_value_usd,
+                COALESCE(trade_count, 0)::bigint AS trade_count,
                 origin_country_code AS country_of_origin,
                 destination_country_code AS destination_country,
                 TO_CHAR(TO_DATE(year || '-' || LPAD(month::text, 2, '0') || '-01', 'YYYY-MM-DD'), 'YYYY-MM-DD') AS date
@@ -179,23 +158,7 @@ def get_shipments(
             params["lim"] = limit
 
         result = db.execute(text(query), params)
-        rows = result.fetchall()
-
-        shipments = []
-        for row in rows:
-            shipments.append({
-                "year": row.year,
-                "month": row.month,
-                "hs_code": row.hs_code,
-                "origin_country_code": row.origin_country_code,
-                "destination_country_code": row.destination_country_code,
-                "total_value_usd": float(row.total_value_usd) if row.total_value_usd else None,
-                "trade_count": int(row.trade_count) if row.trade_count else 0,
-                "country_of_origin": row.origin_country_code,
-                "destination_country": row.destination_country_code,
-                "date": row.date,
-            })
-        return shipments
+        return rows_to_dicts(result, result.fetchall())
     except Exception as e:
         if is_missing_table_error(e):
             logger.warning("country_origin_trade_stats not available: %s", e)
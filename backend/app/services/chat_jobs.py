@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import json
 import threading
+import time
 import uuid
 from typing import Any
 
@@ -12,6 +13,9 @@ from sqlalchemy.orm import Session
 LEASE_MINUTES = 5
 _schema_ready = False
 _schema_lock = threading.Lock()
+PURGE_INTERVAL_SECONDS = 3600
+_last_purge_at: float | None = None
+_purge_lock = threading.Lock()
 
 
 def _mapping(row) -> dict[str, Any] | None:
@@ -54,9 +58,26 @@ def ensure_schema(db: Session) -> None:
             raise
 
 
+def purge_expired_jobs(db: Session) -> None:
+    """Drop week-old finished jobs, at most once per PURGE_INTERVAL_SECONDS per process."""
+    global _last_purge_at
+    if _last_purge_at is not None and time.monotonic() - _last_purge_at < PURGE_INTERVAL_SECONDS:
+        return
+    with _purge_lock:
+        if _last_purge_at is not None and time.monotonic() - _last_purge_at < PURGE_INTERVAL_SECONDS:
+            return
+        try:
+            db.execute(text("DELETE FROM chat_jobs WHERE completed_at < CURRENT_TIMESTAMP - INTERVAL '7 days'"))
+            db.commit()
+            _last_purge_at = time.monotonic()
+        except Exception:
+            db.rollback()
+            raise
+
+
 def create_job(db: Session, *, message: str, history: list[dict[str, str]]) -> dict[str, Any]:
     ensure_schema(db)
-    db.execute(text("DELETE FROM chat_jobs WHERE completed_at < CURRENT_TIMESTAMP - INTERVAL '7 days'"))
+    purge_expired_jobs(db)
     row = db.execute(
         text(
             """
@@ -8,12 +8,18 @@ from sqlalchemy import text
 from sqlalchemy.orm import Session
 
 from ..utils.db_helpers import is_missing_table_error
+from ..utils.ttl_cache import TimedMemo
 
 
 TABLE = "country_origin_trade_stats"
 PARTICIPATION_SCOPE_NOTE = (
     "trade_direction=all uses both-side participation scope: each flow contributes once to origin and once to destination."
 )
+# trade_direction=all 的双侧口径：单次扫描中把每条流向展开为 origin / destination 两行
+BOTH_SIDES_JOIN = (
+    "CROSS JOIN LATERAL (VALUES (origin_country_code), (destination_country_code)) AS side(country_code)"
+)
+_hs_codes_memo = TimedMemo(seconds=300)
 
 
 @dataclass(frozen=True)
@@ -42,18 +48,14 @@ def country_col(trade_direction: Optional[str]) -> str | None:
 
 
 def apply_filters(query: str, params: dict, filters: TradeFilters) -> tuple[str, dict]:
+    # 列表筛选绑定为单个数组参数：SQL 文本不随筛选项数量变化，参数也无需逐项展开
     if filters.hs_code:
-        ph = ", ".join([f":hs_{i}" for i in range(len(filters.hs_code))])
-        query += f" AND hs_code IN ({ph})"
-        for i, code in enumerate(filters.hs_code):
-            params[f"hs_{i}"] = code
+        query += " AND hs_code = ANY(:hs_codes)"
+        params["hs_codes"] = list(filters.hs_code)
 
     if filters.hs_code_prefix:
-        conds = []
-        for i, prefix in enumerate(filters.hs_code_prefix):
-            params[f"hsp_{i}"] = f"{prefix}%"
-            conds.append(f"hs_code LIKE :hsp_{i}")
-        query += f" AND ({' OR '.join(conds)})"
+        query += " AND hs_code LIKE ANY(:hs_prefixes)"
+        params["hs_prefixes"] = [f"{prefix}%" for prefix in filters.hs_code_prefix]
 
     if filters.year is not None:
         query += " AND year = :year"
@@ -63,14 +65,12 @@ def apply_filters(query: str, params: dict, filters: TradeFilters) -> tuple[str,
         params["month"] = filters.month
 
     if filters.country:
-        ph = ", ".join([f":ctry_{i}" for i in range(len(filters.country))])
         col = country_col(filters.trade_direction)
         if col:
-            query += f" AND {col} IN ({ph})"
+            query += f" AND {col} = ANY(:countries)"
         else:
-            query += f" AND (origin_country_code IN ({ph}) OR destination_country_code IN ({ph}))"
-        for i, code in enumerate(filters.country):
-            params[f"ctry_{i}"] = code
+            query += " AND (origin_country_code = ANY(:countries) OR destination_country_code = ANY(:countries))"
+        params["countries"] = list(filters.country)
 
     if filters.start_year_month:
         y, m = filters.start_year_month.split("-")
@@ -93,6 +93,28 @@ def execute_safe(db: Session, query: str, params: dict, fallback):
         raise HTTPException(status_code=500, detail=f"数据库查询错误: {exc}") from exc
 
 
+def available_hs_codes(db: Session) -> list[str]:
+    """Distinct HS codes in the serving table.
+
+    The list only changes when the pipeline publishes a new dataset, so it is
+    loaded once and reused for a few minutes instead of scanning the fact
+    table on every request. Callers get their own copy of the list.
+    """
+
+    def load() -> tuple[str, ...] | None:
+        query = f"""
+            SELECT DISTINCT hs_code FROM {TABLE}
+            WHERE hs_code IS NOT NULL AND hs_code <> ''
+            ORDER BY hs_code
+        """
+        result = execute_safe(db, query, {}, fallback=None)
+        if result is None:
+            return None
+        return tuple(row[0] for row in result.fetchall())
+
+    return list(_hs_codes_memo.get_or_load("hs_codes", load) or ())
+
+
 def metric_sql(metric: Optional[str]) -> tuple[str, str, str, str]:
     metric_key = "trade_count" if metric == "trade_count" else "trade_value"
     share_numerator = "SUM(trade_count)" if metric_key == "trade_count" else "SUM(sum_of_usd)"
@@ -122,11 +144,9 @@ def country_side_source(
         prefix = f"{prefix}, " if prefix else ""
         source = f"""
             (
-                SELECT {prefix}origin_country_code AS country_code, sum_of_usd, trade_count
-                FROM {TABLE}{where}
-                UNION ALL
-                SELECT {prefix}destination_country_code AS country_code, sum_of_usd, trade_count
-                FROM {TABLE}{where}
+                SELECT {prefix}side.country_code, sum_of_usd, trade_count
+                FROM {TABLE}
+                {BOTH_SIDES_JOIN}{where}
             ) side_scope
         """
         return source, params, "country_code"
@@ -143,8 +163,11 @@ def hs_participation_source(
 ) -> tuple[str, dict]:
     """Return a FROM source for HS participation queries.
 
-    The all-direction source intentionally duplicates each flow once per side to
-    keep existing both-side participation semantics.
+    The all-direction source counts each flow once per side to keep existing
+    both-side participation semantics; both sides share the flow's HS code, so
+    that is a doubling rather than a second scan. Because rows are doubled
+    instead of repeated, callers may only aggregate it with SUM(); COUNT(*),
+    AVG() and the like over side_scope would be wrong.
     """
     direction = normalize_direction(filters.trade_direction)
     where, params = apply_filters(" WHERE 1=1", params, filters)
@@ -153,9 +176,8 @@ def hs_participation_source(
     if direction == "all":
         return f"""
             (
-                SELECT {period_cols}hs_code, sum_of_usd, trade_count FROM {TABLE}{where}
-                UNION ALL
-                SELECT {period_cols}hs_code, sum_of_usd, trade_count FROM {TABLE}{where}
+                SELECT {period_cols}hs_code, sum_of_usd * 2 AS sum_of_usd, trade_count * 2 AS trade_count
+                FROM {TABLE}{where}
             ) side_scope
         """, params
 
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class TimedMemo:
+    """进程内按 key 缓存结果，超过 seconds 秒后重新加载。"""
+
+    def __init__(self, seconds: float) -> None:
+        self.seconds = seconds
+        self._entries: dict[Hashable, tuple[float, object]] = {}
+        self._lock = threading.Lock()
+
+    def _fresh(self, key: Hashable):
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() - entry[0] < self.seconds:
+            return entry
+        return None
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], T]) -> T:
+        """命中则直接返回；否则加锁调用 loader。loader 抛错或返回 None 时不写入缓存。"""
+        entry = self._fresh(key)
+        if entry is not None:
+            return entry[1]
+        with self._lock:
+            entry = self._fresh(key)
+            if entry is not None:
+                return entry[1]
+            value = loader()
+            if value is not None:
+                self._entries[key] = (time.monotonic(), value)
+            return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
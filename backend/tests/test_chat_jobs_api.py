@@ -1,7 +1,9 @@
+import pytest
 from fastapi.testclient import TestClient
 
 from app.main import app
 from app.routes import chat_jobs
+from app.services import chat_jobs as chat_service
 
 
 client = TestClient(app)
@@ -42,3 +44,46 @@ def test_get_chat_job_returns_worker_result(monkeypatch) -> None:
     response = client.get("/api/chat-jobs/chat-1")
     assert response.status_code == 200
     assert response.json()["answer"] == "Trade concentration increased."
+
+
+class _PurgeSession:
+    def __init__(self, fail: bool = False) -> None:
+        self.fail = fail
+        self.calls: list[str] = []
+
+    def execute(self, statement, *_args, **_kwargs):
+        self.calls.append("delete")
+        if self.fail:
+            raise RuntimeError("database unavailable")
+
+    def commit(self) -> None:
+        self.calls.append("commit")
+
+    def rollback(self) -> None:
+        self.calls.append("rollback")
+
+
+def test_expired_chat_jobs_are_purged_at_most_once_per_interval(monkeypatch) -> None:
+    monkeypatch.setattr(chat_service, "_last_purge_at", None)
+    db = _PurgeSession()
+
+    chat_service.purge_expired_jobs(db)
+    chat_service.purge_expired_jobs(db)
+    assert db.calls == ["delete", "commit"]
+
+    monkeypatch.setattr(chat_service, "PURGE_INTERVAL_SECONDS", 0)
+    chat_service.purge_expired_jobs(db)
+    assert db.calls == ["delete", "commit", "delete", "commit"]
+
+
+def test_failed_purge_rolls_back_and_is_retried(monkeypatch) -> None:
+    monkeypatch.setattr(chat_service, "_last_purge_at", None)
+    failing = _PurgeSession(fail=True)
+
+    with pytest.raises(RuntimeError):
+        chat_service.purge_expired_jobs(failing)
+    assert failing.calls == ["delete", "rollback"]
+
+    db = _PurgeSession()
+    chat_service.purge_expired_jobs(db)
+    assert db.calls == ["delete", "commit"]
@@ -0,0 +1,242 @@
+from collections import namedtuple
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.database import get_db
+from app.main import app
+from app.routes import companies
+from app.schemas import Shipment
+from app.services import trade_query
+
+
+client = TestClient(app)
+
+ShipmentRow = namedtuple("ShipmentRow", list(Shipment.model_fields))
+TopCountryRow = namedtuple("TopCountryRow", "country_code sum_of_usd trade_count amount_share_pct")
+SearchRow = namedtuple(
+    "SearchRow",
+    "name brand_name country_code country_count role category_labels total_trade_value trade_count",
+)
+
+
+class _FakeResult:
+    def __init__(self, rows) -> None:
+        self.rows = rows
+
+    def scalar(self):
+        return self.rows[0][0] if self.rows else None
+
+    def fetchall(self):
+        return self.rows
+
+
+class _FakeSession:
+    """按 SQL 片段返回预设行；responses 的值可以是行列表或要抛出的异常。"""
+
+    def __init__(self, responses: dict) -> None:
+        self.responses = responses
+        self.statements: list[str] = []
+
+    def execute(self, statement, *_args, **_kwargs):
+        sql = str(statement)
+        self.statements.append(sql)
+        for fragment, response in self.responses.items():
+            if fragment in sql:
+                if isinstance(response, Exception):
+                    raise response
+                return _FakeResult(response)
+        raise AssertionError(f"unexpected query: {sql}")
+
+
+@pytest.fixture
+def fake_db():
+    def install(responses: dict) -> _FakeSession:
+        session = _FakeSession(responses)
+        app.dependency_overrides[get_db] = lambda: session
+        return session
+
+    companies._column_memo.clear()
+    trade_query._hs_codes_memo.clear()
+    yield install
+    app.dependency_overrides.pop(get_db, None)
+    companies._column_memo.clear()
+    trade_query._hs_codes_memo.clear()
+
+
+def test_company_search_returns_rows_and_reuses_column_probe(fake_db) -> None:
+    db = fake_db(
+        {
+            "information_schema.columns": [(True,)],
+            "FROM company_search_stats s": [
+                SearchRow("Acme Fab", "Acme", "US", 1, "importer", ["Equipment"], 1250.0, 3),
+            ],
+        }
+    )
+
+    response = client.get("/api/companies/search", params={"q": "acme", "country": ["US"]})
+    assert response.status_code == 200
+    assert response.json() == [
+        {
+            "name": "Acme Fab",
+            "brand_name": "Acme",
+            "country_code": "US",
+            "country_count": 1,
+            "role": "importer",
+            "category_labels": ["Equipment"],
+            "total_trade_value": 1250.0,
+            "trade_count": 3,
+        }
+    ]
+
+    client.get("/api/companies/search", params={"q": "acme"})
+    probes = [sql for sql in db.statements if "information_schema.columns" in sql]
+    assert len(probes) == 1
+
+
+def test_company_search_returns_empty_list_when_stats_table_is_missing(fake_db) -> None:
+    fake_db(
+        {
+            "information_schema.columns": [(False,)],
+            "FROM company_search_stats s": Exception('relation "company_search_stats" does not exist'),
+        }
+    )
+
+    response = client.get("/api/companies/search")
+    assert response.status_code == 200
+    assert response.json() == []
+
+
+def test_hs_code_categories_adds_chapter_name(fake_db) -> None:
+    db = fake_db({"SELECT DISTINCT hs_code": [("848610",), ("854231",)]})
+
+    response = client.get("/api/hs-code-categories")
+    assert response.status_code == 200
+    assert response.json() == [
+        {"hs_code": "848610", "chapter_name": "HS 84"},
+        {"hs_code": "854231", "chapter_name": "HS 85"},
+    ]
+
+    assert client.get("/api/hs-code-categories").json() == response.json()
+    assert len(db.statements) == 1
+
+
+def test_hs_code_categories_returns_empty_list_when_table_is_missing(fake_db) -> None:
+    db = fake_db({"SELECT DISTINCT hs_code": Exception('relation "country_origin_trade_stats" does not exist')})
+
+    response = client.get("/api/hs-code-categories")
+    assert response.status_code == 200
+    assert response.json() == []
+
+    # 缺表时不缓存空结果，下一次请求会重新查询
+    client.get("/api/hs-code-categories")
+    assert len(db.statements) == 2
+
+
+def test_top_countries_all_direction_scans_trade_stats_once(fake_db) -> None:
+    db = fake_db(
+        {
+            "FROM country_origin_trade_stats": [
+                TopCountryRow("CHN", 3000.0, 12, 0.6),
+                TopCountryRow("USA", 2000.0, 8, 0.4),
+            ],
+        }
+    )
+
+    response = client.get(
+        "/api/country-trade-stats/top-countries",
+        params={"trade_direction": "all", "hs_code": ["854231"], "limit": 5},
+    )
+    assert response.status_code == 200
+    assert response.json() == [
+        {"country_code": "CHN", "sum_of_usd": 3000.0, "trade_count": 12, "amount_share_pct": 0.6},
+        {"country_code": "USA", "sum_of_usd": 2000.0, "trade_count": 8, "amount_share_pct": 0.4},
+    ]
+
+    (sql,) = db.statements
+    assert sql.count("country_origin_trade_stats") == 1
+    assert "side(country_code)" in sql
+    assert "UNION ALL" not in sql
+
+
+def _assert_selects_shipment_columns(sql: str) -> None:
+    for field in Shipment.model_fields:
+        assert field in sql
+
+
+def test_shipments_map_selected_columns_onto_shipment(fake_db) -> None:
+    db = fake_db(
+        {
+            "TO_CHAR(": [
+                ShipmentRow(2024, 3, "854231", "TWN", "USA", 1500.0, 4, "TWN", "USA", "2024-03-01"),
+                ShipmentRow(2024, 3, "848610", "NLD", "CHN", None, 0, "NLD", "CHN", "2024-03-01"),
+            ],
+        }
+    )
+
+    response = client.get("/api/shipments", params={"country": ["USA"], "limit": 2})
+    assert response.status_code == 200
+    assert response.json() == [
+        {
+            "year": 2024,
+            "month": 3,
+            "hs_code": "854231",
+            "origin_country_code": "TWN",
+            "destination_country_code": "USA",
+            "total_value_usd": 1500.0,
+            "trade_count": 4,
+            "country_of_origin": "TWN",
+            "destination_country": "USA",
+            "date": "2024-03-01",
+        },
+        {
+            "year": 2024,
+            "month": 3,
+            "hs_code": "848610",
+            "origin_country_code": "NLD",
+            "destination_country_code": "CHN",
+            "total_value_usd": None,
+            "trade_count": 0,
+            "country_of_origin": "NLD",
+            "destination_country": "CHN",
+            "date": "2024-03-01",
+        },
+    ]
+    _assert_selects_shipment_columns(db.statements[0])
+
+
+def test_shipment_flows_map_selected_columns_onto_shipment(fake_db) -> None:
+    db = fake_db(
+        {
+            "GROUP BY LEFT(hs_code, 2)": [
+                ShipmentRow(0, 0, "85", "TWN", "USA", 1500.0, 4, "TWN", "USA", None),
+            ],
+        }
+    )
+
+    response = client.get("/api/shipments/flows", params={"hs_code_prefix": ["85"]})
+    assert response.status_code == 200
+    assert response.json() == [
+        {
+            "year": 0,
+            "month": 0,
+            "hs_code": "85",
+            "origin_country_code": "TWN",
+            "destination_country_code": "USA",
+            "total_value_usd": 1500.0,
+            "trade_count": 4,
+            "country_of_origin": "TWN",
+            "destination_country": "USA",
+            "date": None,
+        }
+    ]
+    _assert_selects_shipment_columns(db.statements[0])
+
+
+@pytest.mark.parametrize("path", ["/api/shipments", "/api/shipments/flows"])
+def test_shipments_return_empty_list_when_table_is_missing(fake_db, path: str) -> None:
+    fake_db({"FROM country_origin_trade_stats": Exception('relation "country_origin_trade_stats" does not exist')})
+
+    response = client.get(path)
+    assert response.status_code == 200
+    assert response.json() == []
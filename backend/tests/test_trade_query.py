@@ -0,0 +1,23 @@
+from app.services.trade_query import TradeFilters, apply_filters
+
+
+def test_apply_filters_binds_lists_as_single_array_params() -> None:
+    query, params = apply_filters(
+        " WHERE 1=1",
+        {},
+        TradeFilters(hs_code=["854231", "854232"], hs_code_prefix=["84"], country=["CHN", "USA"], trade_direction="import"),
+    )
+
+    assert query == (
+        " WHERE 1=1 AND hs_code = ANY(:hs_codes) AND hs_code LIKE ANY(:hs_prefixes)"
+        " AND destination_country_code = ANY(:countries)"
+    )
+    assert params == {"hs_codes": ["854231", "854232"], "hs_prefixes": ["84%"], "countries": ["CHN", "USA"]}
+
+
+def test_apply_filters_query_text_does_not_depend_on_list_length() -> None:
+    one, _ = apply_filters(" WHERE 1=1", {}, TradeFilters(country=["CHN"]))
+    many, _ = apply_filters(" WHERE 1=1", {}, TradeFilters(country=["CHN", "USA", "JPN"]))
+
+    assert one == many
+    assert "origin_country_code = ANY(:countries) OR destination_country_code = ANY(:countries)" in one
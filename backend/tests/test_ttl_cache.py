@@ -0,0 +1,40 @@
+import pytest
+
+from app.utils.ttl_cache import TimedMemo
+
+
+def test_timed_memo_reuses_value_within_ttl() -> None:
+    memo = TimedMemo(seconds=300)
+    calls = []
+
+    def load() -> str:
+        calls.append(1)
+        return "value"
+
+    assert memo.get_or_load("key", load) == "value"
+    assert memo.get_or_load("key", load) == "value"
+    assert len(calls) == 1
+
+    memo.clear()
+    memo.get_or_load("key", load)
+    assert len(calls) == 2
+
+
+def test_timed_memo_reloads_after_expiry() -> None:
+    memo = TimedMemo(seconds=0)
+    calls = []
+    memo.get_or_load("key", lambda: calls.append(1) or True)
+    memo.get_or_load("key", lambda: calls.append(1) or True)
+    assert len(calls) == 2
+
+
+def test_timed_memo_does_not_store_failed_or_empty_loads() -> None:
+    memo = TimedMemo(seconds=300)
+
+    def fail():
+        raise RuntimeError("database unavailable")
+
+    with pytest.raises(RuntimeError):
+        memo.get_or_load("key", fail)
+    assert memo.get_or_load("key", lambda: None) is None
+    assert memo.get_or_load("key", lambda: "loaded") == "loaded"